@@ -1,6 +1,14 @@
 import click
 import yaml
 
+# Prefer the libyaml C bindings, fall back to the pure-Python implementation when
+# PyYAML is built without them.
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
 
 def merge_yaml_files(input_files, output_file):
     print("input files ", input_files)
@@ -8,9 +16,11 @@ def merge_yaml_files(input_files, output_file):
 
     # Loop through the provided YAML files
     for file_path in input_files:
-        with open(file_path, "r") as file:
-            data = yaml.safe_load(file)
-            # Merge data; extend merged_data with each file's contents
+        with open(file_path, "rb") as file:
+            content = file.read()
+        # Merge data one document at a time; extend merged_data with each
+        # document's nodes.
+        for data in yaml.load_all(content, Loader=SafeLoader):
             if isinstance(data, dict):
                 merged_data["nodes"].extend(data["nodes"])
             else:
@@ -21,7 +31,7 @@ def merge_yaml_files(input_files, output_file):
 
     # Write the merged data to the output file
     with open(output_file, "w") as file:
-        yaml.dump(merged_data, file)
+        yaml.dump(merged_data, file, Dumper=SafeDumper)
 
     print(
         f"Merged YAML with {len(merged_data['nodes'])} "
@@ -1,9 +1,19 @@
 import glob
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 import click
+import numpy as np
 
-from graph_generator.main import handle_main
+from graph_generator.executor import Executor
+from graph_generator.graph import Graph, GraphConfig
+from graph_generator.main import (
+    config_from_yaml,
+    configure_logging,
+    handle_main,
+    load_yaml,
+)
 
 
 @click.command()
@@ -39,6 +49,12 @@ from graph_generator.main import handle_main
     type=int,
     required=True,
 )
+@click.option(
+    "--jobs",
+    help="Number of runs executed in parallel. Defaults to the number of CPUs.",
+    type=int,
+    default=None,
+)
 def main(
     graph: str,
     stop: int,
@@ -47,17 +63,31 @@ def main(
     fault_begin: int,
     fault_end: int,
     max_num_sweep: int,
+    jobs: int | None,
 ):
+    configure_logging()
     if fault_begin >= fault_end or fault_end == 0:
         raise ValueError("fault_begin must be less than fault_end and none zero.")
     if fault_begin + max_num_sweep >= fault_end:
         raise ValueError("fault_begin + max_num_sweep must be less than fault_end.")
+    if max_num_sweep < 1:
+        raise ValueError("max_num_sweep must be positive.")
+    if fault_begin <= 0 or fault_end >= stop:
+        raise ValueError(
+            "Cannot inject fault at a non-positive time or exceeds the stop time."
+        )
 
-    injection_time = sorted(
-        set(
-            round(fault_begin + i * (fault_end - fault_begin) / (max_num_sweep - 1))
-            for i in range(max_num_sweep)
+    injection_time = (
+        np.unique(
+            np.round(
+                fault_begin
+                + np.arange(max_num_sweep)
+                * (fault_end - fault_begin)
+                / max(max_num_sweep - 1, 1)
+            )
         )
+        .astype(np.int64)
+        .tolist()
     )
 
     os.makedirs(output_dir, exist_ok=True)
@@ -66,21 +96,48 @@ def main(
 
     print(f"Injecting {fault_files} at time {injection_time}")
 
-    for fault in fault_files:
-        fault_file_name = os.path.splitext(os.path.basename(fault))[0]
-        subdir = f"{output_dir}/{fault_file_name}"
-        os.makedirs(subdir, exist_ok=True)
-        for inject_at in injection_time:
-            handle_main(
-                graph=graph,
-                fault=fault,
-                stop=stop,
-                edge_index_output=f"{subdir}/edge_index.csv",
-                node_feature_output=f"{subdir}/node_feature_inject_at_{inject_at}.csv",
-                fault_label_output=f"{subdir}/fault_label_inject_at_{inject_at}.csv",
-                inject_at=inject_at,
-                viz=False,
-            )
+    # Parse every YAML file once and reuse it for the whole sweep.
+    graph_data = load_yaml(graph)
+    with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(
+        # spawned workers (the default on macOS) do not inherit the logging setup
+        max_workers=jobs,
+        initializer=configure_logging,
+    ) as pool:
+        # All runs are identical until the earliest fault injection. Simulate that
+        # once and let every run resume from there.
+        checkpoint = f"{tmp_dir}/checkpoint.pkl"
+        Executor(
+            graph=Graph(config_from_yaml(graph_data, GraphConfig)), stop_at=stop
+        ).checkpoint(checkpoint, at=injection_time[0])
+        # Every run writes to its own files, so they can be executed in parallel.
+        runs = []
+        for fault in fault_files:
+            fault_file_name = os.path.splitext(os.path.basename(fault))[0]
+            subdir = f"{output_dir}/{fault_file_name}"
+            os.makedirs(subdir, exist_ok=True)
+            fault_data = load_yaml(fault)
+            for i, inject_at in enumerate(injection_time):
+                runs.append(
+                    pool.submit(
+                        handle_main,
+                        graph=graph_data,
+                        fault=fault_data,
+                        stop=stop,
+                        # the edge index is shared by all runs of a fault, only the
+                        # first one dumps it.
+                        edge_index_output=(
+                            f"{subdir}/edge_index.csv" if i == 0 else None
+                        ),
+                        node_feature_output=f"{subdir}/node_feature_inject_at_{inject_at}.csv",
+                        fault_label_output=f"{subdir}/fault_label_inject_at_{inject_at}.csv",
+                        inject_at=inject_at,
+                        viz=False,
+                        checkpoint=checkpoint,
+                    )
+                )
+        # surface any failure from the workers
+        for run in runs:
+            run.result()
 
 
 if __name__ == "__main__":
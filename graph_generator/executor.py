@@ -1,14 +1,17 @@
+from __future__ import annotations
+
 import csv
 import enum
 import heapq
+import io
+import itertools
+import logging
 import os
-import random
+import pickle
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterable, List, TextIO, Tuple
 
-import matplotlib.pyplot as plt
-import networkx as nx
-from matplotlib.animation import FuncAnimation
+import numpy as np
 
 from graph_generator.fault_injection import FaultConfig
 from graph_generator.graph import Graph
@@ -18,57 +21,203 @@ from graph_generator.node import (
     LoopConfig,
     LostInputCallbackConfig,
     Node,
-    NodeConfig,
     NominalCallbackConfig,
     SubscriptionConfig,
 )
 
+logger = logging.getLogger(__name__)
+
+# Number of random integers drawn at once for each publish value/delay range.
+_RAND_BATCH_SIZE = 4096
+# Feature rows are written to the CSV output in chunks of this many rows.
+_CSV_ROWS_PER_WRITE = 4096
+_CSV_FILE_BUFFER_SIZE = 1 << 20
+# csv.writer's default line terminator, kept for compatibility with earlier outputs.
+_CSV_LINE_TERMINATOR = "\r\n"
+
 
 class NodeColor(enum.Enum):
     NORMAL = "blue"
     FAULTY = "red"
 
 
-@dataclass(order=True)
+# Graphs with more nodes get a cheaper layout when visualized.
+_SPRING_LAYOUT_MAX_NODES = 100
+
+# Priority of each type of work. Events at the same time on the same node run
+# loops first, then subscriptions and then watchdogs. The priority also indexes
+# the executor's work handlers.
+_LOOP_PRIORITY = 0
+_SUBSCRIPTION_PRIORITY = 1
+_WATCHDOG_PRIORITY = 2
+
+# Callbacks run for subscriptions that do not configure one. They have nothing to
+# publish or inject, so one shared instance of each is enough.
+_NOOP_NOMINAL_CALLBACK = NominalCallbackConfig(noop=True)
+_NOOP_INVALID_INPUT_CALLBACK = InvalidInputCallbackConfig(noop=True)
+_NOOP_LOST_INPUT_CALLBACK = LostInputCallbackConfig(noop=True)
+
+
 class Event:
     """
     This class represents an event in the event queue. All events are first
     ordered by the timestamp. To break ties, use the node config as well as
-    the even priority.
+    the even priority. Events are never compared directly, see `sort_key`.
     """
 
     @dataclass
     class WatchDogConfig:
         sub: SubscriptionConfig
 
-        def __lt__(self, other: "Event.WatchDogConfig"):
-            return self.sub < other.sub
-
-    # The timestamp of this event
-    timestamp: int
-    # The associated Node for this event, which will perform some work
-    node: Node
-    work_priority: int = 0
-
-    # The type of the work to be performed.
-    work: LoopConfig | SubscriptionConfig | WatchDogConfig | None = None
-    # The data associated with the subscription. If the work type is WatchDog,
-    # this is the last received time of the subscription.
-    subscription_data: int | None = None
-
-    def __post_init__(self):
-        # Define a priority for each work type
-        work_type_priority = {
-            LoopConfig: 0,
-            SubscriptionConfig: 1,
-            Event.WatchDogConfig: 2,
-        }
-        assert self.work
-        object.__setattr__(
-            self, "work_priority", work_type_priority.get(type(self.work), -1)
+    # One is allocated for every queued work item, so avoid a per-instance dict.
+    __slots__ = ("timestamp", "node", "work_priority", "work", "subscription_data")
+
+    def __init__(
+        self,
+        timestamp: int,
+        node: Node,
+        work: LoopConfig | SubscriptionConfig | WatchDogConfig,
+        work_priority: int,
+        subscription_data: int | None = None,
+    ):
+        # The timestamp of this event
+        self.timestamp = timestamp
+        # The associated Node for this event, which will perform some work
+        self.node = node
+        # The type of the work to be performed.
+        self.work = work
+        # One of the _*_PRIORITY values, matching the type of the work. Callers
+        # always know what they enqueue so it is not derived from the work.
+        self.work_priority = work_priority
+        # The data associated with the subscription. If the work type is WatchDog,
+        # this is the last received time of the subscription.
+        self.subscription_data = subscription_data
+
+    def with_timestamp(self, timestamp: int) -> Event:
+        """Returns a copy of this event that happens at `timestamp`."""
+        return Event(
+            timestamp=timestamp,
+            node=self.node,
+            work=self.work,
+            work_priority=self.work_priority,
+            subscription_data=self.subscription_data,
+        )
+
+    def sort_key(self) -> Tuple[str, int, str, int]:
+        """
+        Returns a tuple of plain values that orders events sharing the same timestamp
+        by node name, work priority, topic and subscription data, so that heap
+        operations are cheap tuple comparisons that never touch the node or the
+        work configs.
+        """
+        if isinstance(self.work, SubscriptionConfig):
+            topic = self.work.topic
+        elif isinstance(self.work, Event.WatchDogConfig):
+            topic = self.work.sub.topic
+        else:
+            topic = ""
+        return (
+            self.node.config.name,
+            self.work_priority,
+            topic,
+            self.subscription_data if self.subscription_data is not None else 0,
         )
 
 
+class EventQueue:
+    """
+    A priority queue of events. Many events share the same timestamp (aligned loop
+    periods, watchdogs, publishes with equal delays), so the heap only holds one
+    entry per distinct timestamp and each timestamp owns a small heap (bucket) of
+    (*sort_key, seq, event) tuples. The sequence number keeps the ordering stable
+    and guarantees events are never compared.
+    """
+
+    def __init__(self):
+        self._time_heap: List[int] = []
+        self._time_buckets: Dict[int, List[Tuple]] = {}
+        self._seq = itertools.count()
+        # Whether the bucket of the smallest timestamp in _time_heap has been drained.
+        # Popping the last event of a timestamp is usually followed by pushing work
+        # at a new timestamp (e.g. the next loop period), so the drained entry is
+        # kept and replaced by that push with a single heapreplace.
+        self._drained_head = False
+
+    def push(self, event: Event):
+        entry = (*event.sort_key(), next(self._seq), event)
+        bucket = self._time_buckets.get(event.timestamp)
+        if bucket is None:
+            if self._drained_head:
+                heapq.heapreplace(self._time_heap, event.timestamp)
+                self._drained_head = False
+            else:
+                heapq.heappush(self._time_heap, event.timestamp)
+            self._time_buckets[event.timestamp] = [entry]
+        else:
+            heapq.heappush(bucket, entry)
+
+    def extend(self, events: Iterable[Event]):
+        """
+        Pushes many events at once. Touched buckets and the timestamp heap are
+        heapified once instead of sifting every event in, which is cheaper when
+        scheduling all the initial work of a large graph.
+        """
+        if self._drained_head:
+            self._discard_drained_head()
+        touched = set()
+        for event in events:
+            entry = (*event.sort_key(), next(self._seq), event)
+            bucket = self._time_buckets.get(event.timestamp)
+            if bucket is None:
+                self._time_heap.append(event.timestamp)
+                self._time_buckets[event.timestamp] = [entry]
+            else:
+                bucket.append(entry)
+            touched.add(event.timestamp)
+        for timestamp in touched:
+            heapq.heapify(self._time_buckets[timestamp])
+        heapq.heapify(self._time_heap)
+
+    def pop(self) -> Event:
+        if self._drained_head:
+            self._discard_drained_head()
+        timestamp = self._time_heap[0]
+        bucket = self._time_buckets[timestamp]
+        event = heapq.heappop(bucket)[-1]
+        if not bucket:
+            del self._time_buckets[timestamp]
+            self._drained_head = True
+        return event
+
+    def next_timestamp(self) -> int:
+        if self._drained_head:
+            self._discard_drained_head()
+        return self._time_heap[0]
+
+    def clear(self):
+        self._time_heap.clear()
+        self._time_buckets.clear()
+        self._drained_head = False
+
+    def __bool__(self) -> bool:
+        return len(self._time_heap) > self._drained_head
+
+    def _discard_drained_head(self):
+        heapq.heappop(self._time_heap)
+        self._drained_head = False
+
+    def __getstate__(self):
+        # itertools.count is not reliably picklable, save where it would resume.
+        state = self.__dict__.copy()
+        state["_seq"] = next(self._seq)
+        self._seq = itertools.count(state["_seq"])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._seq = itertools.count(state["_seq"])
+
+
 def event_to_str(event: LoopConfig | SubscriptionConfig | Event.WatchDogConfig) -> str:
     if isinstance(event, LoopConfig):
         return "loop"
@@ -98,34 +247,148 @@ class Executor:
             fault_config (FaultConfig | None, optional): Configuration for fault injection. Defaults to None.
         """
         self.current_time = 0
+        # Every simulated event is logged at DEBUG level. Check the level once rather
+        # than formatting messages that would be discarded.
+        self._log_events = logger.isEnabledFor(logging.DEBUG)
         self.graph = graph
         self.stop_at = stop_at
+        # Names used to validate fault configs
+        self._loop_node_names = {n.config.name for n in graph.nodes_with_loops()}
+        self._subscriber_names = {
+            topic: {n.config.name for n in subscribers}
+            for topic, subscribers in graph.topic_subscriber_map.items()
+        }
         if fault_config:
             self._process_fault_config(fault_config)
             self.fault_config = fault_config
 
-        nodes_with_loop = graph.nodes_with_loops()
-        self.event_queue = [
-            Event(timestamp=0, node=node, work=node.config.loop)
-            for node in nodes_with_loop
-            if node.config.loop
+        # Subscribers of each topic along with their subscription config, in the same
+        # order as graph.topic_subscribers(topic).
+        topic_dispatch: Dict[str, List[Tuple[Node, SubscriptionConfig]]] = {}
+        for node in graph.nodes.values():
+            for sub in node.config.subscribe or []:
+                topic_dispatch.setdefault(sub.topic, []).append((node, sub))
+        self._topic_dispatch = {
+            topic: tuple(dispatch) for topic, dispatch in topic_dispatch.items()
+        }
+
+        self.event_queue = EventQueue()
+        initial_events = [
+            Event(
+                timestamp=0,
+                node=node,
+                work=node.config.loop,
+                work_priority=_LOOP_PRIORITY,
+            )
+            for node in graph.nodes_with_loops()
         ]
-        # Enqueue all the subscription watchdog
+        # All the subscription watchdogs
         for node in graph.nodes.values():
-            if node.config.subscribe:
-                for sub in node.config.subscribe:
-                    self._maybe_enqueue_watchdog_work(node, sub, -1)
+            for sub in node.config.subscribe or []:
+                if sub.watchdog is not None:
+                    initial_events.append(self._watchdog_event(node, sub, -1))
+        self.event_queue.extend(initial_events)
+
+        # The output is overwritten when the simulation starts.
+        self.output = os.path.expanduser(output) if output else None
+        self._rng = np.random.default_rng(24)
+        # Pre-drawn random integers for each inclusive (low, high) range, consumed
+        # from the back. See _randint().
+        self._rand_pools: Dict[Tuple[int, int], List[int]] = {}
+        # Node colors are only tracked when visualizing, see start(). Headless runs
+        # bind a no-op so the handlers never branch on viz.
+        self._update_node_colors = self._skip_node_colors
+        # Handler for each type of work, indexed by the event's work priority
+        self._work_handlers = (
+            self._handle_loop_work,
+            self._handle_subscription_work,
+            self._handle_watchdog_work,
+        )
+        # CSV rows simulated before a checkpoint was taken, see restore().
+        self._csv_prefix = ""
+        # A CSV row holds the features of the entire graph. A step only ever changes
+        # the features of the node it runs on, so each node's part of the row is
+        # kept preformatted and only reformatted when that node's features change.
+        self._cell_buffer = io.StringIO()
+        self._cell_writer = csv.writer(self._cell_buffer, lineterminator="")
+        self._node_slots = {node: i for i, node in enumerate(graph.nodes.values())}
+        self._node_features = [node.feature.copy() for node in graph.nodes.values()]
+        self._feature_cells = [
+            self._format_cells(node.feature) for node in graph.nodes.values()
+        ]
+        # Whether the features changed since the last row was written.
+        self._feature_row_dirty = True
 
-        heapq.heapify(self.event_queue)
+    def checkpoint(self, path: str, at: int):
+        """
+        Simulates all events before time `at` and saves the simulation state to `path`.
+        Runs that only differ from `at` onwards, e.g. a sweep of fault injection times,
+        can restore() the checkpoint instead of simulating the common prefix again.
+        This executor must not have a fault config and must not have been started.
 
-        self.output = None
-        if output:
-            self.output = os.path.expanduser(output)
-            if os.path.exists(output):
-                os.remove(output)
-        random.seed(24)
-        # number of times a plot is drawn. It's used to speed up the visualization.
-        self.draw = 0
+        Args:
+            path (str): The file path to save the checkpoint to.
+            at (int): The time to stop at. Events at this time are not simulated.
+        """
+        assert getattr(self, "fault_config", None) is None
+        assert 0 <= at < self.stop_at
+        rows = io.StringIO()
+        self._run(rows, until=at)
+        state = {
+            "graph": self.graph,
+            "at": at,
+            "current_time": self.current_time,
+            "event_queue": self.event_queue,
+            "rng": self._rng,
+            "rand_pools": self._rand_pools,
+            "csv_prefix": rows.getvalue(),
+            "feature_row_dirty": self._feature_row_dirty,
+        }
+        with open(os.path.expanduser(path), "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def restore(
+        cls,
+        path: str,
+        *,
+        stop_at: int,
+        output: str | None = None,
+        fault_config: FaultConfig | None = None,
+    ) -> Executor:
+        """
+        Creates an executor that resumes from a checkpoint saved by checkpoint(). The
+        output, if any, also contains the rows simulated before the checkpoint.
+
+        Args:
+            path (str): The checkpoint file path.
+            stop_at (int): The simulation stop time.
+            output (str | None, optional): The output file path for logging results. Defaults to None.
+            fault_config (FaultConfig | None, optional): Configuration for fault injection, not earlier than the checkpoint. Defaults to None.
+        """
+        with open(os.path.expanduser(path), "rb") as file:
+            state = pickle.load(file)
+        # Events before the checkpoint time ran without the fault.
+        if fault_config and (
+            fault_config.inject_at is None or fault_config.inject_at < state["at"]
+        ):
+            raise ValueError(
+                f"Cannot inject fault at {fault_config.inject_at} before the "
+                f"checkpoint time {state['at']}"
+            )
+        executor = cls(
+            graph=state["graph"],
+            stop_at=stop_at,
+            output=output,
+            fault_config=fault_config,
+        )
+        executor.current_time = state["current_time"]
+        executor.event_queue = state["event_queue"]
+        executor._rng = state["rng"]
+        executor._rand_pools = state["rand_pools"]
+        executor._csv_prefix = state["csv_prefix"]
+        executor._feature_row_dirty = state["feature_row_dirty"]
+        return executor
 
     def start(self, viz: bool = False):
         """
@@ -136,26 +399,28 @@ class Executor:
             viz (bool, optional): Whether to display the simulation graphically. Defaults to False.
         """
         self._print_sim_summary()
-        self.viz = viz
         if viz:
-            self.G = nx.DiGraph()
-            for name, _ in self.graph.nodes.items():
-                self.G.add_node(name)
-            for src, dests in self.graph.adjacency_list.items():
-                for dest in dests:
-                    self.G.add_edge(src.config.name, dest.config.name)
-
-            self.networkx_nodes = list(self.G.nodes)
+            # matplotlib and networkx are slow to import and only needed here, keep
+            # them out of headless runs.
+            import matplotlib.pyplot as plt
+            import networkx as nx
+            from matplotlib.animation import FuncAnimation
+            from matplotlib.colors import to_rgba, to_rgba_array
+
+            self._node_color_rgba = {color: to_rgba(color.value) for color in NodeColor}
+            self._update_node_colors = self._draw_node_colors
+            self._build_viz_graph()
             self.node_colors = [NodeColor.NORMAL.value] * len(self.networkx_nodes)
-            self.pos = nx.spring_layout(self.G, k=5, iterations=200, seed=24)
 
             # Initialize the figure and axis
             fig, self.ax = plt.subplots(figsize=(12, 10))
-            nx.draw_networkx_nodes(self.G, self.pos, node_color="blue", ax=self.ax)
+            # Node colors are updated in place on this collection, see
+            # _draw_node_colors().
+            self.node_collection = nx.draw_networkx_nodes(
+                self.G, self.pos, node_color=self.node_colors, ax=self.ax
+            )
+            self.node_rgba = to_rgba_array(self.node_colors)
             nx.draw_networkx_edges(self.G, pos=self.pos, ax=self.ax)
-            self.label_pos = {
-                node: (coord[0], coord[1] + 0.08) for node, coord in self.pos.items()
-            }
             nx.draw_networkx_labels(self.G, pos=self.label_pos, ax=self.ax)
             self.timestamp_text = self.ax.text(
                 0, 1, "Time: 0", transform=self.ax.transAxes, ha="left", va="top"
@@ -164,9 +429,9 @@ class Executor:
             # returned value should be assigned to keep the animation running
             anim = FuncAnimation(
                 fig,
-                self._simulate_one_step,
+                self._animate_one_step,
                 interval=1,
-                blit=False,
+                blit=True,
                 cache_frame_data=True,
                 repeat=False,
             )
@@ -174,284 +439,368 @@ class Executor:
             plt.show()
         else:
             if self.output:
-                with open(self.output, mode="a", newline="") as file:
-                    writer = csv.writer(file)
-                    last_row_feature = None
-                    while len(self.event_queue):
-                        if self._simulate_one_step():
-                            flattened_features = self._get_all_node_features()
-                            # deduplicate features. Sometimes a step could only involve
-                            # watchdog checks which could lead to no feature update.
-                            if flattened_features != last_row_feature:
-                                # Each row corresponds to each graph feature snapshots
-                                writer.writerow(flattened_features)
-                                last_row_feature = flattened_features
+                with open(
+                    self.output, mode="w", newline="", buffering=_CSV_FILE_BUFFER_SIZE
+                ) as file:
+                    file.write(self._csv_prefix)
+                    self._run(file)
             else:
                 # just run the simulation without writing to a file
-                while len(self.event_queue):
-                    self._simulate_one_step()
+                self._run()
 
-    def _update_node_colors(self, node_idx: int, color: NodeColor):
-        if self.viz and self.node_colors[node_idx] != color.value:
+    def _run(self, output: TextIO | None = None, until: int | None = None):
+        """
+        Simulates all events before time `until`, or until the queue drains. If `output`
+        is given, graph feature snapshots are written to it as CSV rows.
+        """
+        pending_rows: List[str] = []
+        while self.event_queue and (
+            until is None or self.event_queue.next_timestamp() < until
+        ):
+            cur_event = self.event_queue.pop()
+            has_worked = self._process_event(cur_event)
+            if output is not None:
+                self._refresh_feature_cells(cur_event.node)
+                # deduplicate features. Sometimes a step could only involve
+                # watchdog checks which could lead to no feature update.
+                if has_worked and self._feature_row_dirty:
+                    # Each row corresponds to each graph feature snapshots
+                    pending_rows.append(",".join(self._feature_cells))
+                    self._feature_row_dirty = False
+                    if len(pending_rows) == _CSV_ROWS_PER_WRITE:
+                        self._write_rows(output, pending_rows)
+                        pending_rows.clear()
+        if pending_rows:
+            assert output is not None
+            self._write_rows(output, pending_rows)
+
+    def _refresh_feature_cells(self, node: Node):
+        slot = self._node_slots[node]
+        if self._node_features[slot] != node.feature:
+            self._node_features[slot] = node.feature.copy()
+            self._feature_cells[slot] = self._format_cells(node.feature)
+            self._feature_row_dirty = True
+
+    def _format_cells(self, values: List) -> str:
+        "format values the same way csv.writer would, without the line terminator"
+        self._cell_buffer.seek(0)
+        self._cell_buffer.truncate()
+        self._cell_writer.writerow(values)
+        return self._cell_buffer.getvalue()
+
+    @staticmethod
+    def _write_rows(output: TextIO, rows: List[str]):
+        output.write(_CSV_LINE_TERMINATOR.join(rows))
+        output.write(_CSV_LINE_TERMINATOR)
+
+    def _build_viz_graph(self):
+        """
+        Builds the networkx graph and its layout for visualization. They only depend on
+        the graph, so they are built once and reused.
+        """
+        if getattr(self, "G", None) is not None:
+            return
+        import networkx as nx
+
+        self.G = nx.DiGraph()
+        for name in self.graph.nodes:
+            self.G.add_node(name)
+        for src, dests in self.graph.adjacency_list.items():
+            for dest in dests:
+                self.G.add_edge(src.config.name, dest.config.name)
+
+        self.networkx_nodes = list(self.G.nodes)
+        # The spring layout is quadratic in the number of nodes per iteration, use
+        # fewer iterations for large graphs.
+        iterations = 200 if len(self.G) <= _SPRING_LAYOUT_MAX_NODES else 50
+        self.pos = nx.spring_layout(self.G, k=5, iterations=iterations, seed=24)
+        self.label_pos = {
+            node: (coord[0], coord[1] + 0.08) for node, coord in self.pos.items()
+        }
+
+    def _skip_node_colors(self, node: Node, color: NodeColor):
+        pass
+
+    def _draw_node_colors(self, node: Node, color: NodeColor):
+        node_idx = self._node_index(node)
+        if self.node_colors[node_idx] != color.value:
             self.node_colors[node_idx] = color.value
-            if self.draw == 20:
-                # redraw everything to speed up the animation.
-                self.draw = 0
-                plt.cla()
-                nx.draw_networkx_edges(self.G, pos=self.pos, ax=self.ax)
-                nx.draw_networkx_labels(self.G, pos=self.label_pos, ax=self.ax)
-                self.timestamp_text = self.ax.text(
-                    0,
-                    1,
-                    f"Time: {self.current_time} ",
-                    transform=self.ax.transAxes,
-                    ha="left",
-                    va="top",
-                )
-                for idx in range(len(self.networkx_nodes)):
-                    nx.draw_networkx_nodes(
-                        self.G,
-                        self.pos,
-                        nodelist=[self.networkx_nodes[idx]],
-                        node_color=self.node_colors[idx],
-                        ax=self.ax,
-                    )
-            else:
-                # just redraw one node.
-                self.draw += 1
-                nx.draw_networkx_nodes(
-                    self.G,
-                    self.pos,
-                    nodelist=[self.networkx_nodes[node_idx]],
-                    node_color=self.node_colors[node_idx],
-                    ax=self.ax,
-                )
+            self.node_rgba[node_idx] = self._node_color_rgba[color]
+            self.node_collection.set_facecolor(self.node_rgba)
 
     def _node_index(self, node: Node) -> int:
         return self.graph.node_index(node.config.name)
 
-    def _simulate_one_step(self, frame=None):
+    def _animate_one_step(self, frame=None):
+        self.timestamp_text.set_text(f"Time: {self.current_time}")
+        self._simulate_one_step()
+        # artists to be redrawn when blitting
+        return self.node_collection, self.timestamp_text
+
+    def _simulate_one_step(self):
         """
         Returns:
             bool: True if a node has executed work. False when no work
             has been done and no feature has changed.
         """
-        if self.viz:
-            self.timestamp_text.set_text(f"Time: {self.current_time}")
-        if len(self.event_queue) == 0:
+        if not self.event_queue:
             return False
-        cur_event = heapq.heappop(self.event_queue)
+        return self._process_event(self.event_queue.pop())
+
+    def _process_event(self, cur_event: Event) -> bool:
         if cur_event.timestamp != self.current_time:
             self.current_time = cur_event.timestamp
             if self.current_time >= self.stop_at:
-                print(
+                logger.info(
                     "\033[92m======== Time limit "
                     f"{self.stop_at} reached ========\033[0m"
                 )
                 # clear the queue and discard all remaining work.
-                self.event_queue = []
+                self.event_queue.clear()
                 return False
-            print(f"Time: {self.current_time}")
+            if self._log_events:
+                logger.debug(f"Time: {self.current_time}")
 
-        if cur_event.node.crashed or cur_event.node.maybe_crash(self.current_time):
+        node = cur_event.node
+        if node.crashed or (
+            node.pending_faults and node.maybe_crash(self.current_time)
+        ):
             assert cur_event.work
             # node has crashed so no need to handle this event.
-            print(
-                f"    \033[91m[{cur_event.node}] has crashed and "
-                f"dropped {event_to_str(cur_event.work)}\033[0m"
-            )
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
+            if self._log_events:
+                logger.debug(
+                    f"    \033[91m[{node}] has crashed and "
+                    f"dropped {event_to_str(cur_event.work)}\033[0m"
+                )
+            self._update_node_colors(node, NodeColor.FAULTY)
             return False
 
-        if isinstance(cur_event.work, LoopConfig):
-            return self._handle_loop_work(cur_event)
-
-        elif isinstance(cur_event.work, SubscriptionConfig):
-            return self._handle_subscription_work(cur_event)
-        elif isinstance(cur_event.work, Event.WatchDogConfig):
-            return self._handle_watchdog_work(cur_event)
-        else:
-            assert False, "Unknown work type"
+        return self._work_handlers[cur_event.work_priority](cur_event)
 
     def _handle_loop_work(self, cur_event: Event):
+        node = cur_event.node
+        now = self.current_time
         loop = cur_event.work
         assert isinstance(loop, LoopConfig)
         assert loop
 
-        # handle fault injection first
-        next_time = cur_event.node.maybe_delay_loop(self.current_time)
-        if next_time is not None:
-            # since the work goes straight back into the queue, we pretend that it didn't do any work and earlyreturn
-            self._schedule_next_periodic_work(loop, cur_event.node, next_time)
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
-            return False
-        if cur_event.node.maybe_drop_loop(self.current_time):
-            # the current work is dropped but the next one is scheduled.
-            self._schedule_next_periodic_work(
-                loop, cur_event.node, self.current_time + loop.period
-            )
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
-            return False
+        # handle fault injection first. Most nodes never have a pending fault, skip
+        # asking them.
+        if node.pending_faults:
+            next_time = node.maybe_delay_loop(now)
+            if next_time is not None:
+                # since the work goes straight back into the queue, we pretend that it didn't do any work and earlyreturn
+                self._schedule_next_periodic_work(loop, node, next_time)
+                self._update_node_colors(node, NodeColor.FAULTY)
+                return False
+            if node.maybe_drop_loop(now):
+                # the current work is dropped but the next one is scheduled.
+                self._schedule_next_periodic_work(loop, node, now + loop.period)
+                self._update_node_colors(node, NodeColor.FAULTY)
+                return False
 
-        self._schedule_next_periodic_work(
-            loop, cur_event.node, self.current_time + loop.period
-        )
+        self._schedule_next_periodic_work(loop, node, now + loop.period)
         # Execute callback for this loop:
-        print(f"    [{cur_event.node}] executing loop callback")
-        cur_event.node.update_event_feature(event=loop, timestamp=cur_event.timestamp)
-        self._execute_callback(cur_event.node, loop.callback)
-        self._update_node_colors(self._node_index(cur_event.node), NodeColor.NORMAL)
+        if self._log_events:
+            logger.debug(f"    [{node}] executing loop callback")
+        node.update_event_feature(event=loop, timestamp=now)
+        self._execute_callback(node, loop.callback)
+        self._update_node_colors(node, NodeColor.NORMAL)
         return True
 
     def _handle_subscription_work(self, cur_event: Event):
+        node = cur_event.node
+        now = self.current_time
         data = cur_event.subscription_data
         assert data is not None
         sub = cur_event.work
         assert isinstance(sub, SubscriptionConfig)
+        topic = sub.topic
         # handle fault injection first
-        if cur_event.node.maybe_drop_receive(self.current_time, sub.topic):
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
-            return False
-        next_time = cur_event.node.maybe_delay_receive(self.current_time, sub.topic)
-        if next_time is not None:
-            # requeue the subscription work to future.
-            self._requeue_work(cur_event, next_time)
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
-            return False
+        if node.pending_faults:
+            if node.maybe_drop_receive(now, topic):
+                self._update_node_colors(node, NodeColor.FAULTY)
+                return False
+            next_time = node.maybe_delay_receive(now, topic)
+            if next_time is not None:
+                # requeue the subscription work to future.
+                self._requeue_work(cur_event, next_time)
+                self._update_node_colors(node, NodeColor.FAULTY)
+                return False
 
-        cur_event.node.receive_message(self.current_time, sub.topic)
-        cur_event.node.update_event_feature(event=sub, timestamp=cur_event.timestamp)
+        node.receive_message(now, topic)
+        node.update_event_feature(event=sub, timestamp=now)
         if sub.valid_range[0] <= data <= sub.valid_range[1]:
             callback = (
-                sub.nominal_callback
-                if sub.nominal_callback
-                else NominalCallbackConfig(noop=True)
-            )
-            print(
-                f"    [{cur_event.node}] executing nominal input callback for "
-                f"{sub.topic}"
+                sub.nominal_callback if sub.nominal_callback else _NOOP_NOMINAL_CALLBACK
             )
-            cur_event.node.update_callback_feature(callback=callback)
-            self._execute_callback(cur_event.node, callback)
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.NORMAL)
+            if self._log_events:
+                logger.debug(
+                    f"    [{node}] executing nominal input callback for {topic}"
+                )
+            node.update_callback_feature(callback=callback)
+            self._execute_callback(node, callback)
+            self._update_node_colors(node, NodeColor.NORMAL)
         else:
             callback = (
                 sub.invalid_input_callback
                 if sub.invalid_input_callback
-                else InvalidInputCallbackConfig(noop=True)
-            )
-            cur_event.node.update_callback_feature(callback=callback)
-            print(
-                f"    \033[91m[{cur_event.node}] executing invalid input callback "
-                f"for {sub.topic}\033[0m"
+                else _NOOP_INVALID_INPUT_CALLBACK
             )
-            self._execute_callback(cur_event.node, callback)
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
+            node.update_callback_feature(callback=callback)
+            if self._log_events:
+                logger.debug(
+                    f"    \033[91m[{node}] executing invalid input callback "
+                    f"for {topic}\033[0m"
+                )
+            self._execute_callback(node, callback)
+            self._update_node_colors(node, NodeColor.FAULTY)
 
         return True
 
     def _handle_watchdog_work(self, cur_event: Event):
+        node = cur_event.node
         watchdog = cur_event.work
         assert isinstance(watchdog, Event.WatchDogConfig)
+        sub = watchdog.sub
         data = cur_event.subscription_data
         assert data is not None
-        print(
-            f"    [{cur_event.node}] executing watchdog callback on topic "
-            f"{watchdog.sub.topic}"
-        )
+        if self._log_events:
+            logger.debug(
+                f"    [{node}] executing watchdog callback on topic {sub.topic}"
+            )
 
-        last_receive = cur_event.node.message_received[watchdog.sub.topic]
+        last_receive = node.message_received[sub.topic]
         if last_receive == data:
             # If last message receipt time is still the same when the watchdog
             # was configured, it means we have not received anything.
-            print(
-                f"    \033[91m[{cur_event.node}] executing lost input callback "
-                f"for {watchdog.sub.topic}\033[0m"
-            )
+            if self._log_events:
+                logger.debug(
+                    f"    \033[91m[{node}] executing lost input callback "
+                    f"for {sub.topic}\033[0m"
+                )
             callback = (
-                watchdog.sub.lost_input_callback
-                if watchdog.sub.lost_input_callback
-                else LostInputCallbackConfig(noop=True)
+                sub.lost_input_callback
+                if sub.lost_input_callback
+                else _NOOP_LOST_INPUT_CALLBACK
             )
-            self._execute_callback(cur_event.node, callback)
-            self._maybe_enqueue_watchdog_work(cur_event.node, watchdog.sub, data)
-            self._update_node_colors(self._node_index(cur_event.node), NodeColor.FAULTY)
+            self._execute_callback(node, callback)
+            self._maybe_enqueue_watchdog_work(node, sub, data)
+            self._update_node_colors(node, NodeColor.FAULTY)
         else:
-            self._maybe_enqueue_watchdog_work(
-                cur_event.node, watchdog.sub, last_receive
-            )
+            self._maybe_enqueue_watchdog_work(node, sub, last_receive)
 
     def _schedule_next_periodic_work(
         self, loop: LoopConfig, node: Node, next_time: int
     ):
-        new_event = Event(timestamp=next_time, node=node, work=loop)
-        heapq.heappush(self.event_queue, new_event)
+        self._push(
+            Event(
+                timestamp=next_time, node=node, work=loop, work_priority=_LOOP_PRIORITY
+            )
+        )
 
     def _requeue_work(self, cur_event: Event, next_time: int):
-        cur_event.timestamp = next_time
-        heapq.heappush(self.event_queue, cur_event)
+        # push a copy rather than moving the popped event, so an event is never
+        # mutated after it has been handed out by the queue.
+        self._push(cur_event.with_timestamp(next_time))
+
+    def _push(self, event: Event):
+        self.event_queue.push(event)
+
+    def _randint(self, value_range: Tuple[int, int]) -> int:
+        """
+        Returns a random integer in the inclusive range, like random.randint. Values
+        are generated by numpy in batches to amortize the per-call overhead.
+        """
+        pool = self._rand_pools.get(value_range)
+        if not pool:
+            low, high = value_range
+            pool = self._rng.integers(
+                low, high, size=_RAND_BATCH_SIZE, endpoint=True
+            ).tolist()
+            self._rand_pools[value_range] = pool
+        return pool.pop()
+
+    def _randints(self, value_range: Tuple[int, int], count: int) -> List[int]:
+        """
+        Returns `count` random integers in the inclusive range, the same values as
+        calling _randint() `count` times.
+        """
+        pool = self._rand_pools.get(value_range)
+        if pool is None or len(pool) < count:
+            return [self._randint(value_range) for _ in range(count)]
+        values = pool[-count:] if count else []
+        del pool[len(pool) - count :]
+        values.reverse()
+        return values
 
     def _execute_callback(self, node: Node, callback: CallbackConfig):
         if callback.publish:
+            now = self.current_time
+            log_events = self._log_events
+            randint = self._randint
+            push = self._push
+            pending_faults = node.pending_faults
             for pub in callback.publish:
-                publish_value = random.randint(*pub.value_range)
+                topic = pub.topic
+                publish_value = randint(pub.value_range)
 
                 # handle fault injection first
-                if node.maybe_drop_publish(self.current_time, pub.topic):
-                    self._update_node_colors(self._node_index(node), NodeColor.FAULTY)
+                if pending_faults and node.maybe_drop_publish(now, topic):
+                    self._update_node_colors(node, NodeColor.FAULTY)
                     continue
-                new_value = node.maybe_mutate_publish(self.current_time, pub.topic)
+                new_value = (
+                    node.maybe_mutate_publish(now, topic) if pending_faults else None
+                )
                 if new_value is not None:
                     publish_value = new_value
-                    self._update_node_colors(self._node_index(node), NodeColor.FAULTY)
+                    self._update_node_colors(node, NodeColor.FAULTY)
                 else:
-                    self._update_node_colors(self._node_index(node), NodeColor.NORMAL)
+                    self._update_node_colors(node, NodeColor.NORMAL)
 
                 node.update_publish_feature()
                 # publish message to all subscribers of this topic
-                for sub_node in self.graph.topic_subscribers(pub.topic):
-                    recv_time_delta = random.randint(*pub.delay_range)
-                    print(
-                        f"        publish to [{sub_node.config.name}] via {pub.topic} "
-                        f" ETA t={recv_time_delta + self.current_time}"
+                subscribers = self._topic_dispatch.get(topic, ())
+                delays = self._randints(pub.delay_range, len(subscribers))
+                for (sub_node, sub), delay in zip(subscribers, delays):
+                    recv_time = now + delay
+                    if log_events:
+                        logger.debug(
+                            f"        publish to [{sub_node.config.name}] via {topic} "
+                            f" ETA t={recv_time}"
+                        )
+                    push(
+                        Event(
+                            timestamp=recv_time,
+                            node=sub_node,
+                            work=sub,
+                            work_priority=_SUBSCRIPTION_PRIORITY,
+                            subscription_data=publish_value,
+                        )
                     )
-                    new_event = Event(
-                        timestamp=self.current_time + recv_time_delta,
-                        node=sub_node,
-                        work=self._find_sub_config(sub_node.config, pub.topic),
-                        subscription_data=publish_value,
-                    )
-                    heapq.heappush(self.event_queue, new_event)
         if callback.fault:
             callback.fault.inject_at = self.current_time
             callback.fault.inject_to = node.config.name
             node.enqueue_fault_config(callback.fault)
 
-    def _find_sub_config(self, node: NodeConfig, topic: str) -> SubscriptionConfig:
-        if not node.subscribe:
-            raise ValueError(f"{node.name} doesn't subscribe to anything")
-        for sub in node.subscribe:
-            if sub.topic == topic:
-                return sub
-        raise ValueError(f"{node.name} doesn't subscribe to {topic}")
-
-    def _get_all_node_features(self) -> List:
-        "get flattened feature list for the entire graph"
-        return [item for node in self.graph.nodes.values() for item in node.feature]
-
     def _maybe_enqueue_watchdog_work(
         self, node: Node, sub: SubscriptionConfig, last_received: int
     ):
         if sub.watchdog is None:
             return
+        self._push(self._watchdog_event(node, sub, last_received))
+
+    def _watchdog_event(
+        self, node: Node, sub: SubscriptionConfig, last_received: int
+    ) -> Event:
         # wake up and check for lost input
-        new_event = Event(
+        return Event(
             timestamp=self.current_time + sub.watchdog,
             node=node,
             work=Event.WatchDogConfig(sub=sub),
+            work_priority=_WATCHDOG_PRIORITY,
             subscription_data=last_received,
         )
-        heapq.heappush(self.event_queue, new_event)
 
     def _process_fault_config(self, config: FaultConfig) -> None:
         self._validate_fault_config(config)
@@ -461,17 +810,18 @@ class Executor:
         assert (
             config.inject_at
         ), "Fault injection config must specify a time via inject_at"
-        self.graph.nodes[config.inject_to].enqueue_fault_config(config)
+        node = self.graph.nodes[config.inject_to]
+        node.enqueue_fault_config(config)
 
     def _validate_fault_config(self, config: FaultConfig) -> None:
         self.loop_mutation = []
         self.sub_mutation = []
         self.pub_mutation = []
         node = config.inject_to
-        if node not in self.graph.nodes.keys():
+        if node not in self.graph.nodes:
             raise ValueError(f"Cannot inject fault to non-existent node {node}")
         if config.affect_loop:
-            if node not in [n.config.name for n in self.graph.nodes_with_loops()]:
+            if node not in self._loop_node_names:
                 raise ValueError(
                     f"Cannot inject loop fault to a node without loop: {node}"
                 )
@@ -485,18 +835,17 @@ class Executor:
                 "Cannot inject publish fault to "
                 f"{node} since it doesn't publish to {config.affect_publish.topic}"
             )
-        if config.affect_receive and node not in [
-            n.config.name
-            for n in self.graph.topic_subscriber_map[config.affect_receive.topic]
-        ]:
+        if config.affect_receive and node not in self._subscriber_names.get(
+            config.affect_receive.topic, ()
+        ):
             raise ValueError(
                 "Cannot inject subscribe fault to "
                 f"{node} since it doesn't subscribe to {config.affect_receive.topic}"
             )
 
     def _print_sim_summary(self):
-        print(
+        logger.info(
             "\n\033[92m======== Executing graph with "
             f"{len(self.graph.nodes)} nodes =========\033[0m"
         )
-        print("Time: 0")
+        logger.debug("Time: 0")
@@ -1,7 +1,7 @@
 import csv
 import os
 
-from strict_base_model import StrictBaseModel
+from strict_base_model import InternedStr, StrictBaseModel
 
 
 class DropPublishConfig(StrictBaseModel):
@@ -9,7 +9,7 @@ class DropPublishConfig(StrictBaseModel):
     This config describes which topic to drop and how many times.
     """
 
-    topic: str
+    topic: InternedStr
     drop: int
 
 
@@ -18,7 +18,7 @@ class MutatePublishConfig(StrictBaseModel):
     This config describes which topic to mutate and use what value.
     """
 
-    topic: str
+    topic: InternedStr
     value: int
     count: int = 1
 
@@ -28,7 +28,7 @@ class DropReceiveConfig(StrictBaseModel):
     This config describes which topic to drop received messages from and how many times.
     """
 
-    topic: str
+    topic: InternedStr
     drop: int
 
 
@@ -38,7 +38,7 @@ class DelayReceiveConfig(StrictBaseModel):
     It only delays a single instance.
     """
 
-    topic: str
+    topic: InternedStr
     delay: int
     count: int = 1
 
@@ -100,8 +100,6 @@ class FaultConfig(StrictBaseModel):
         :param output: The path to the output file.
         """
         output = os.path.expanduser(output)
-        if os.path.exists(output):
-            os.remove(output)
-        with open(output, mode="a", newline="") as file:
+        with open(output, mode="w", newline="") as file:
             writer = csv.writer(file)
             writer.writerow([index, self.inject_at])
@@ -1,11 +1,8 @@
-import csv
 import os
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-import matplotlib.pyplot as plt
-import networkx as nx
 from strict_base_model import StrictBaseModel
 
 from graph_generator.node import CallbackConfig, Node, NodeConfig
@@ -23,34 +20,42 @@ class Graph:
         self.topic_publisher_map = dict()
         self.topic_subscriber_map = defaultdict(list)
         self.adjacency_list = defaultdict(list)
+        # Subscribers of each topic as a set, for duplicate checks while building.
+        self._topic_subscriber_sets = defaultdict(set)
 
         for node in config.nodes:
             self._add_node(Node(node))
+        self._node_indices = {name: i for i, name in enumerate(self.nodes)}
+        self._nodes_with_loops = tuple(
+            node for node in self.nodes.values() if node.config.loop
+        )
 
         self._build_graph()
 
     def dump_edge_index(self, output: str):
         output = os.path.expanduser(output)
-        if os.path.exists(output):
-            os.remove(output)
         node_to_index = {node: i for i, node in enumerate(self.nodes.values())}
 
-        with open(output, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            for src, dests in self.adjacency_list.items():
-                for dest in dests:
-                    writer.writerow([node_to_index[src], node_to_index[dest]])
+        # The rows are only pairs of ints, format them directly and write them at once
+        # rather than going through csv.writer row by row.
+        rows = "".join(
+            f"{node_to_index[src]},{node_to_index[dest]}\r\n"
+            for src, dests in self.adjacency_list.items()
+            for dest in dests
+        )
+        with open(output, mode="w", newline="") as file:
+            file.write(rows)
 
     def node_index(self, name: str) -> int:
-        return list(self.nodes.values()).index(self.nodes[name])
+        return self._node_indices[name]
 
     def _add_node(self, node: Node):
-        if node.config.name in self.nodes.keys():
+        if node.config.name in self.nodes:
             raise ValueError(f"Node name must be unique: {node.config.name}")
         self.nodes[node.config.name] = node
 
     def _build_graph(self):
-        for _, node in self.nodes.items():
+        for node in self.nodes.values():
             if node.config.loop:
                 loop = node.config.loop
                 if not loop.callback.publish:
@@ -74,9 +79,24 @@ class Graph:
             for subscriber in self.topic_subscriber_map[topic]:
                 self.adjacency_list[publisher].append(subscriber)
 
+        # The graph is never modified once built. Freeze the maps into plain dicts of
+        # tuples, which are cheaper to iterate and never grow entries on lookup.
+        self.topic_subscriber_map = {
+            topic: tuple(subscribers)
+            for topic, subscribers in self.topic_subscriber_map.items()
+        }
+        self.adjacency_list = {
+            src: tuple(dests) for src, dests in self.adjacency_list.items()
+        }
+        del self._topic_subscriber_sets
+
     def visualize(self):
+        # only needed for visualization and slow to import
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         G = nx.DiGraph()
-        for name, _ in self.nodes.items():
+        for name in self.nodes:
             G.add_node(name)
         for src, dests in self.adjacency_list.items():
             for dest in dests:
@@ -84,29 +104,31 @@ class Graph:
         nx.draw_spectral(G, with_labels=True)
         plt.show()
 
-    def nodes_with_loops(self):
-        return [node for _, node in self.nodes.items() if node.config.loop]
+    def nodes_with_loops(self) -> Tuple[Node, ...]:
+        return self._nodes_with_loops
 
-    def topic_subscribers(self, topic: str) -> List[Node]:
-        return self.topic_subscriber_map.get(topic, [])
+    def topic_subscribers(self, topic: str) -> Tuple[Node, ...]:
+        return self.topic_subscriber_map.get(topic, ())
 
     def topic_publisher(self, topic: str) -> Node | None:
         return self.topic_publisher_map.get(topic, None)
 
     def _add_publisher(self, topic: str, publisher: Node):
         if (
-            topic in self.topic_publisher_map.keys()
+            topic in self.topic_publisher_map
             and self.topic_publisher_map[topic] != publisher
         ):
             raise ValueError(
                 f"Duplicate publisher for topic {topic}: "
-                "{self.topic_publisher_map[topic]} and {publisher}"
+                f"{self.topic_publisher_map[topic]} and {publisher}"
             )
         self.topic_publisher_map[topic] = publisher
 
     def _add_subscriber(self, topic: str, subscriber: Node):
-        if subscriber in self.topic_subscriber_map[topic]:
-            raise ValueError(f"Duplicate subscriber " "{subscriber} for topic {topic}")
+        subscribers = self._topic_subscriber_sets[topic]
+        if subscriber in subscribers:
+            raise ValueError(f"Duplicate subscriber {subscriber} for topic {topic}")
+        subscribers.add(subscriber)
         self.topic_subscriber_map[topic].append(subscriber)
 
     def _add_publisher_from_callback(self, node: Node, callback: CallbackConfig):
@@ -115,6 +137,6 @@ class Graph:
                 self._add_publisher(topic=publish.topic, publisher=node)
 
     topic_publisher_map: dict[str, Node]
-    topic_subscriber_map: defaultdict[str, List[Node]]
-    adjacency_list: defaultdict[Node, List[Node]]
+    topic_subscriber_map: Dict[str, Tuple[Node, ...]]
+    adjacency_list: Dict[Node, Tuple[Node, ...]]
     nodes: Dict[str, Node]
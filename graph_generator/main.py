@@ -1,8 +1,19 @@
-from typing import Type, TypeVar
+import functools
+import logging
+import os
+import sys
+from typing import Any, Dict, Type, TypeVar
 
 import click
 import yaml
 
+# Prefer the libyaml C loader, fall back to the pure-Python one when PyYAML is
+# built without it.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 from graph_generator.executor import Executor
 from graph_generator.fault_injection import FaultConfig
 from graph_generator.graph import Graph, GraphConfig
@@ -10,22 +21,59 @@ from graph_generator.graph import Graph, GraphConfig
 T = TypeVar("T")
 
 
-def config_from_yaml(config_path: str, config_class: Type[T]) -> T:
-    with open(config_path, "r") as file:
-        return config_class.parse_obj(yaml.safe_load(file))
+def load_yaml(path: str) -> Any:
+    """
+    Loads a YAML file. Results are cached until the file is modified, so the returned
+    data is shared between callers and must not be modified.
+    """
+    path = os.path.abspath(path)
+    return _load_yaml(path, os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=64)
+def _load_yaml(path: str, mtime_ns: int) -> Any:
+    # Hand the whole file to the loader at once, libyaml decodes it in C rather than
+    # pulling the text through Python-level reads.
+    with open(path, "rb") as file:
+        return yaml.load(file.read(), Loader=SafeLoader)
+
+
+def config_from_yaml(config: str | Dict[str, Any], config_class: Type[T]) -> T:
+    """
+    Builds a config from a YAML file path, or from YAML data that was already loaded
+    with load_yaml(). The data is only read, so it can be reused across calls.
+    """
+    data = load_yaml(config) if isinstance(config, str) else config
+    return config_class.model_validate(data)
+
+
+def configure_logging(verbose: bool = False):
+    """
+    Sends log messages to stdout. Every simulated event is logged at DEBUG level,
+    which is only enabled when `verbose` is set.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    # only this package logs at DEBUG level, not its dependencies
+    logging.getLogger("graph_generator").setLevel(
+        logging.DEBUG if verbose else logging.INFO
+    )
 
 
 def handle_main(
-    graph: str,
-    fault: str | None,
+    graph: str | Dict[str, Any],
+    fault: str | Dict[str, Any] | None,
     viz: bool,
     stop: int,
-    edge_index_output: str,
+    edge_index_output: str | None,
     node_feature_output: str | None,
     fault_label_output: str | None,
     inject_at: int | None,
+    checkpoint: str | None = None,
 ):
     """
+    Runs the graph, optionally resuming from a checkpoint saved by
+    Executor.checkpoint() instead of simulating from time 0.
+
       A
      / \
     B   C
@@ -57,12 +105,20 @@ def handle_main(
                 f"Cannot inject fault at a non-positive time or exceeds the stop time {stop}"
             )
 
-    executor = Executor(
-        graph=graph_obj,
-        stop_at=stop,
-        fault_config=fault_config,
-        output=node_feature_output,
-    )
+    if checkpoint:
+        executor = Executor.restore(
+            checkpoint,
+            stop_at=stop,
+            fault_config=fault_config,
+            output=node_feature_output,
+        )
+    else:
+        executor = Executor(
+            graph=graph_obj,
+            stop_at=stop,
+            fault_config=fault_config,
+            output=node_feature_output,
+        )
 
     executor.start(viz=viz)
 
@@ -80,6 +136,9 @@ def handle_main(
     "--fault", help="Paths to fault injection config YAML file", type=str, default=None
 )
 @click.option("--viz", help="Visualize the graph", is_flag=True, default=False)
+@click.option(
+    "--verbose", help="Log every simulated event", is_flag=True, default=False
+)
 @click.option("--stop", help="Stop at max time unit", type=int, default=50)
 @click.option(
     "--edge_index_output",
@@ -119,11 +178,13 @@ def main(
     fault: str | None,
     viz: bool,
     stop: int,
-    edge_index_output: str,
+    edge_index_output: str | None,
     node_feature_output: str | None,
     fault_label_output: str | None,
     inject_at: int | None,
+    verbose: bool,
 ):
+    configure_logging(verbose)
     handle_main(
         graph=graph,
         fault=fault,
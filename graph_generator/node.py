@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
+import logging
+from collections import deque
 from enum import Enum, auto
-from typing import Any, List, Tuple, Type
+from typing import Any, Dict, List, Tuple
 
-from strict_base_model import StrictBaseModel
+from strict_base_model import InternedStr, StrictBaseModel
 
 from graph_generator.fault_injection import (
     DelayLoopConfig,
@@ -16,6 +17,8 @@ from graph_generator.fault_injection import (
     MutatePublishConfig,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class PublishConfig(StrictBaseModel):
     """
@@ -23,7 +26,7 @@ class PublishConfig(StrictBaseModel):
     value_range. The delay_range models any transmission delay (unit-less)
     """
 
-    topic: str
+    topic: InternedStr
     value_range: Tuple[int, int]
     delay_range: Tuple[int, int] = (0, 0)
 
@@ -69,7 +72,7 @@ class SubscriptionConfig(StrictBaseModel):
     executed. This is useful to simulate handling dropped or delayed messages from upstream.
     """
 
-    topic: str
+    topic: InternedStr
     valid_range: Tuple[int, int]
     watchdog: int | None = None
 
@@ -111,13 +114,16 @@ class NodeConfig(StrictBaseModel):
         if config.loop:
             ret = len(config.loop.callback.publish)
         if config.subscribe:
-            for sub in config.subscribe:
-                if sub.nominal_callback and sub.nominal_callback.publish:
-                    ret += len(sub.nominal_callback.publish)
-                if sub.invalid_input_callback and sub.invalid_input_callback.publish:
-                    ret += len(sub.invalid_input_callback.publish)
-                if sub.lost_input_callback and sub.lost_input_callback.publish:
-                    ret += len(sub.lost_input_callback.publish)
+            ret += sum(
+                len(callback.publish)
+                for sub in config.subscribe
+                for callback in (
+                    sub.nominal_callback,
+                    sub.invalid_input_callback,
+                    sub.lost_input_callback,
+                )
+                if callback and callback.publish
+            )
         return ret
 
 
@@ -150,34 +156,24 @@ class NodeFeatureTemplate:
 
     def initial_feature(self, config: NodeConfig):
         feature: List[Any] = [0] * len(NodeFeatureTemplate.FeatureIndex)
-        feature[NodeFeatureTemplate.FeatureIndex.NODE_NAME.value] = config.name
-        feature[NodeFeatureTemplate.FeatureIndex.LOOP_PERIOD.value] = (
-            config.loop.period if config.loop else 0
-        )
-        feature[NodeFeatureTemplate.FeatureIndex.NUM_SUBSCRIPTIONS.value] = (
-            len(config.subscribe) if config.subscribe else 0
-        )
-        feature[NodeFeatureTemplate.FeatureIndex.NUM_PUBLICATIONS.value] = (
-            NodeConfig.num_publications(config)
-        )
+        feature[_NODE_NAME] = config.name
+        feature[_LOOP_PERIOD] = config.loop.period if config.loop else 0
+        feature[_NUM_SUBSCRIPTIONS] = len(config.subscribe) if config.subscribe else 0
+        feature[_NUM_PUBLICATIONS] = NodeConfig.num_publications(config)
         return feature
 
     def update_event_feature(
         self, feature: List, event: LoopConfig | SubscriptionConfig, timestamp: int
     ):
-        feature[NodeFeatureTemplate.FeatureIndex.LAST_EVENT_TYPE.value] = (
-            NodeFeatureTemplate.EVENT_FEATURE_MAPPING[type(event)]
-        )
-        feature[NodeFeatureTemplate.FeatureIndex.LAST_EVENT_TIMESTAMP.value] = timestamp
+        feature[_LAST_EVENT_TYPE] = _EVENT_FEATURES[type(event)]
+        feature[_LAST_EVENT_TIMESTAMP] = timestamp
         if isinstance(event, LoopConfig):
-            feature[NodeFeatureTemplate.FeatureIndex.LOOP_COUNT.value] += 1
+            feature[_LOOP_COUNT] += 1
         else:
-            feature[
-                NodeFeatureTemplate.FeatureIndex.SUBSCRIPTION_TOTAL_COUNT.value
-            ] += 1
+            feature[_SUBSCRIPTION_TOTAL_COUNT] += 1
 
     def update_publish_feature(self, feature: List):
-        feature[NodeFeatureTemplate.FeatureIndex.PUBLISH_COUNT.value] += 1
+        feature[_PUBLISH_COUNT] += 1
 
     def update_callback_feature(
         self,
@@ -189,12 +185,46 @@ class NodeFeatureTemplate:
             | LoopCallbackConfig
         ),
     ):
-        feature[NodeFeatureTemplate.FeatureIndex.CALLBACK_TYPE.value] = (
-            NodeFeatureTemplate.CALLBACK_FEATURE_MAPPING[type(callback)]
-        )
+        feature[_CALLBACK_TYPE] = _CALLBACK_FEATURES[type(callback)]
+
+
+# Plain int positions of each feature, so the per-event updates index the feature
+# list directly instead of resolving an enum member every time.
+_NODE_NAME = NodeFeatureTemplate.FeatureIndex.NODE_NAME.value
+_NUM_SUBSCRIPTIONS = NodeFeatureTemplate.FeatureIndex.NUM_SUBSCRIPTIONS.value
+_NUM_PUBLICATIONS = NodeFeatureTemplate.FeatureIndex.NUM_PUBLICATIONS.value
+_LOOP_PERIOD = NodeFeatureTemplate.FeatureIndex.LOOP_PERIOD.value
+_LAST_EVENT_TIMESTAMP = NodeFeatureTemplate.FeatureIndex.LAST_EVENT_TIMESTAMP.value
+_LAST_EVENT_TYPE = NodeFeatureTemplate.FeatureIndex.LAST_EVENT_TYPE.value
+_CALLBACK_TYPE = NodeFeatureTemplate.FeatureIndex.CALLBACK_TYPE.value
+_LOOP_COUNT = NodeFeatureTemplate.FeatureIndex.LOOP_COUNT.value
+_SUBSCRIPTION_TOTAL_COUNT = (
+    NodeFeatureTemplate.FeatureIndex.SUBSCRIPTION_TOTAL_COUNT.value
+)
+_PUBLISH_COUNT = NodeFeatureTemplate.FeatureIndex.PUBLISH_COUNT.value
+# Same for the feature values of each event and callback type.
+_EVENT_FEATURES = NodeFeatureTemplate.EVENT_FEATURE_MAPPING
+_CALLBACK_FEATURES = NodeFeatureTemplate.CALLBACK_FEATURE_MAPPING
+# The template holds no state, all nodes share one.
+_FEATURE_TEMPLATE = NodeFeatureTemplate()
 
 
 class NodeFaultInjectionState:
+    # The runtime state of a fault, consulted on every event of a faulty node.
+    __slots__ = (
+        "fault_config",
+        "action_count",
+        "done",
+        "_inject_at",
+        "_crash",
+        "_drop_loop_limit",
+        "_delay_loop_limit",
+        "_drop_receive",
+        "_delay_receive",
+        "_drop_publish",
+        "_mutate_publish",
+    )
+
     def __init__(self, config: FaultConfig):
         self.fault_config = config
 
@@ -202,142 +232,136 @@ class NodeFaultInjectionState:
 
         self.done = False
 
-    def handle_action(
-        self,
-        config_attr: str,
-        config_type: Type,
-        count_attr: str,
-        return_attr: str | None = None,
-        cur_time: int | None = None,
-    ) -> int | None:
+        # The should_* checks run on every event of a faulty node. Resolve what the
+        # config affects once, so they only compare plain values. A callback fault is
+        # re-stamped with a later inject_at each time it fires, but time never goes
+        # back, so the inject_at seen here is equivalent for every later check.
+        assert config.inject_at
+        self._inject_at = config.inject_at
+        self._crash = config.crash is True
+        loop = config.affect_loop
+        self._drop_loop_limit = loop.drop if isinstance(loop, DropLoopConfig) else 0
+        self._delay_loop_limit = loop.count if isinstance(loop, DelayLoopConfig) else 0
+        # (topic, limit) of each topic fault, or None when not affected.
+        receive = config.affect_receive
+        self._drop_receive = (
+            (receive.topic, receive.drop)
+            if isinstance(receive, DropReceiveConfig)
+            else None
+        )
+        self._delay_receive = (
+            (receive.topic, receive.count)
+            if isinstance(receive, DelayReceiveConfig)
+            else None
+        )
+        publish = config.affect_publish
+        self._drop_publish = (
+            (publish.topic, publish.drop)
+            if isinstance(publish, DropPublishConfig)
+            else None
+        )
+        self._mutate_publish = (
+            (publish.topic, publish.count)
+            if isinstance(publish, MutatePublishConfig)
+            else None
+        )
+
+    def _count_action(self, limit: int) -> None:
         """
-        General handler for actions like delay, drop, or mutate.
-        :param config_attr: Attribute in fault_config to check (e.g., "affect_loop").
-        :param config_type: Expected type of the configuration (e.g., DropLoopConfig).
-        :param count_attr: Attribute in the config to use for comparison (e.g., "drop" or "count").
-        :param return_attr: Optional attribute to return (e.g., "delay" or "value").
-        :param cur_time: Optional current time for delay calculations.
-        :return: Optional integer result, such as a delay time or mutation value.
+        Records that the fault acted once. It is done after acting `limit` times.
         """
-        config = getattr(self.fault_config, config_attr)
-        assert config and isinstance(config, config_type)
-
         self.action_count += 1
-        if self.action_count == getattr(config, count_attr):
+        if self.action_count == limit:
             self.done = True
 
-        if return_attr:
-            result = getattr(config, return_attr)
-            return result + cur_time if cur_time is not None else result
-        return None
-
     def crash(self) -> None:
         self.done = True
 
     def drop_loop(self) -> None:
-        self.handle_action("affect_loop", DropLoopConfig, "drop")
+        config = self.fault_config.affect_loop
+        assert isinstance(config, DropLoopConfig)
+        self._count_action(config.drop)
 
     def delay_loop(self, cur_time: int) -> int:
-        ret = self.handle_action(
-            "affect_loop", DelayLoopConfig, "count", "delay", cur_time
-        )
-        assert ret is not None
-        return ret
+        config = self.fault_config.affect_loop
+        assert isinstance(config, DelayLoopConfig)
+        self._count_action(config.count)
+        return cur_time + config.delay
 
     def delay_receive(self, cur_time: int) -> int:
-        ret = self.handle_action(
-            "affect_receive", DelayReceiveConfig, "count", "delay", cur_time
-        )
-        assert ret is not None
-        return ret
+        config = self.fault_config.affect_receive
+        assert isinstance(config, DelayReceiveConfig)
+        self._count_action(config.count)
+        return cur_time + config.delay
 
     def drop_receive(self) -> None:
-        self.handle_action("affect_receive", DropReceiveConfig, "drop")
+        config = self.fault_config.affect_receive
+        assert isinstance(config, DropReceiveConfig)
+        self._count_action(config.drop)
 
     def drop_publish(self) -> None:
-        self.handle_action("affect_publish", DropPublishConfig, "drop")
+        config = self.fault_config.affect_publish
+        assert isinstance(config, DropPublishConfig)
+        self._count_action(config.drop)
 
     def mutate_publish(self) -> int:
-        ret = self.handle_action(
-            "affect_publish", MutatePublishConfig, "count", "value"
-        )
-        assert ret is not None
-        return ret
+        config = self.fault_config.affect_publish
+        assert isinstance(config, MutatePublishConfig)
+        self._count_action(config.count)
+        return config.value
 
     def should_crash(self, cur_time: int) -> bool:
-        assert self.fault_config.inject_at
-        return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.crash is not None
-            and self.fault_config.crash is True
-        )
+        return self._crash and cur_time >= self._inject_at
 
     def should_drop_loop(self, cur_time: int) -> bool:
-        assert self.fault_config.inject_at
-        return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.affect_loop is not None
-            and isinstance(self.fault_config.affect_loop, DropLoopConfig)
-            and self.action_count < self.fault_config.affect_loop.drop
-        )
+        return cur_time >= self._inject_at and self.action_count < self._drop_loop_limit
 
     def should_delay_loop(self, cur_time: int) -> bool:
-        assert self.fault_config.inject_at
         return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.affect_loop is not None
-            and isinstance(self.fault_config.affect_loop, DelayLoopConfig)
-            and self.action_count < self.fault_config.affect_loop.count
+            cur_time >= self._inject_at and self.action_count < self._delay_loop_limit
         )
 
     def should_drop_receive(self, cur_time: int, topic: str) -> bool:
-        assert self.fault_config.inject_at
-        return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.affect_receive is not None
-            and isinstance(self.fault_config.affect_receive, DropReceiveConfig)
-            and topic == self.fault_config.affect_receive.topic
-            and self.action_count < self.fault_config.affect_receive.drop
-        )
+        return self._should_affect_topic(self._drop_receive, cur_time, topic)
 
     def should_delay_receive(self, cur_time: int, topic: str) -> bool:
-        assert self.fault_config.inject_at
-        return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.affect_receive is not None
-            and isinstance(self.fault_config.affect_receive, DelayReceiveConfig)
-            and topic == self.fault_config.affect_receive.topic
-            and self.action_count < self.fault_config.affect_receive.count
-        )
+        return self._should_affect_topic(self._delay_receive, cur_time, topic)
 
     def should_drop_publish(self, cur_time: int, topic: str) -> bool:
-        assert self.fault_config.inject_at
-        return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.affect_publish is not None
-            and isinstance(self.fault_config.affect_publish, DropPublishConfig)
-            and topic == self.fault_config.affect_publish.topic
-            and self.action_count < self.fault_config.affect_publish.drop
-        )
+        return self._should_affect_topic(self._drop_publish, cur_time, topic)
 
     def should_mutate_publish(self, cur_time: int, topic: str) -> bool:
-        assert self.fault_config.inject_at
+        return self._should_affect_topic(self._mutate_publish, cur_time, topic)
+
+    def _should_affect_topic(
+        self, affected: Tuple[str, int] | None, cur_time: int, topic: str
+    ) -> bool:
         return (
-            cur_time >= self.fault_config.inject_at
-            and self.fault_config.affect_publish is not None
-            and isinstance(self.fault_config.affect_publish, MutatePublishConfig)
-            and topic == self.fault_config.affect_publish.topic
-            and self.action_count < self.fault_config.affect_publish.count
+            affected is not None
+            and cur_time >= self._inject_at
+            and topic == affected[0]
+            and self.action_count < affected[1]
         )
 
 
 class Node:
+    # Nodes are accessed on every event, keep their attributes in slots.
+    __slots__ = (
+        "config",
+        "feature",
+        "message_received",
+        "pending_faults",
+        "is_crashed",
+    )
+
     def __init__(self, config: NodeConfig):
         self.config = config
-        self.feature_template = NodeFeatureTemplate()
-        self.feature = self.feature_template.initial_feature(self.config)
-        # Time when the last message was received for a topic.
-        self.message_received = defaultdict(int)
+        self.feature = _FEATURE_TEMPLATE.initial_feature(self.config)
+        # Time when the last message was received for each subscribed topic, 0 if
+        # never received.
+        self.message_received: Dict[str, int] = {
+            sub.topic: 0 for sub in config.subscribe or []
+        }
         Node._validate_config(config)
         self.pending_faults: deque[NodeFaultInjectionState] = deque()
         self.is_crashed = False
@@ -346,14 +370,24 @@ class Node:
     def crashed(self) -> bool:
         return self.is_crashed
 
-    def update_event_feature(self, **kwarg):
-        self.feature_template.update_event_feature(self.feature, **kwarg)
+    def update_event_feature(
+        self, event: LoopConfig | SubscriptionConfig, timestamp: int
+    ):
+        _FEATURE_TEMPLATE.update_event_feature(self.feature, event, timestamp)
 
-    def update_publish_feature(self, **kwarg):
-        self.feature_template.update_publish_feature(self.feature, **kwarg)
+    def update_publish_feature(self):
+        _FEATURE_TEMPLATE.update_publish_feature(self.feature)
 
-    def update_callback_feature(self, **kwarg):
-        self.feature_template.update_callback_feature(self.feature, **kwarg)
+    def update_callback_feature(
+        self,
+        callback: (
+            NominalCallbackConfig
+            | InvalidInputCallbackConfig
+            | LostInputCallbackConfig
+            | LoopCallbackConfig
+        ),
+    ):
+        _FEATURE_TEMPLATE.update_callback_feature(self.feature, callback)
 
     def enqueue_fault_config(self, config: FaultConfig):
         assert (
@@ -367,7 +401,7 @@ class Node:
     def maybe_drop_loop(self, cur_time: int) -> bool:
         for fault in self.pending_faults:
             if fault.should_drop_loop(cur_time):
-                print(
+                logger.info(
                     f"    \033[91mNode: {self.config.name} dropped loop "
                     f"at {cur_time}\033[0m"
                 )
@@ -381,7 +415,7 @@ class Node:
         for fault in self.pending_faults:
             if fault.should_delay_loop(cur_time):
                 next_time = fault.delay_loop(cur_time)
-                print(
+                logger.info(
                     "    \033[91mNode: "
                     f"{self.config.name} delayed loop to {next_time}\033[0m"
                 )
@@ -394,7 +428,7 @@ class Node:
         for fault in self.pending_faults:
             if fault.should_drop_receive(cur_time, topic):
                 fault.drop_receive()
-                print(
+                logger.info(
                     "    \033[91mNode: "
                     f"{self.config.name} dropped received message from "
                     f"{topic}\033[0m"
@@ -408,7 +442,7 @@ class Node:
         for fault in self.pending_faults:
             if fault.should_delay_receive(cur_time, topic):
                 next_time = fault.delay_receive(cur_time)
-                print(
+                logger.info(
                     "    \033[91m"
                     f"[{self.config.name}] delayed received message from "
                     f"{topic} to {next_time}\033[0m"
@@ -422,7 +456,7 @@ class Node:
         for fault in self.pending_faults:
             if fault.should_drop_publish(cur_time, topic):
                 fault.drop_publish()
-                print(
+                logger.info(
                     "    \033[91m"
                     f"[{self.config.name}] dropped published message to "
                     f"{topic}\033[0m"
@@ -436,7 +470,7 @@ class Node:
         for fault in self.pending_faults:
             if fault.should_mutate_publish(cur_time, topic):
                 new_value = fault.mutate_publish()
-                print(
+                logger.info(
                     "    \033[91m"
                     f"[{self.config.name}] mutated published message to "
                     f"{topic}\033[0m"
@@ -450,7 +484,7 @@ class Node:
         for fault in self.pending_faults:
             if fault.should_crash(cur_time):
                 fault.crash()
-                print(
+                logger.info(
                     "    \033[91m" f"[{self.config.name}] crashed at {cur_time}\033[0m"
                 )
 
@@ -1,7 +1,14 @@
-from pydantic import BaseModel
+import sys
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel, ConfigDict
+
+# A string that is interned once validated. Use it for fields whose values come
+# from a small set and are used as dict keys or compared often, like topic names,
+# so those operations can short-circuit on identity.
+InternedStr = Annotated[str, AfterValidator(sys.intern)]
 
 
 # Custom base model with Config that forbids extra fields
 class StrictBaseModel(BaseModel):
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")